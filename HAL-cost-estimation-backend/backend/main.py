@@ -1,46 +1,73 @@
+import os
+from contextlib import asynccontextmanager
+from importlib import import_module
 from fastapi import FastAPI
 from .db import engine
 from .models.models import Base
-from .routes import cost_estimation
 from fastapi.middleware.cors import CORSMiddleware
 
-from .routes import (
-    operation_type,
-    machines,
-    dimensions,
-    duties,
-    materials,
-    machine_selection,
-    mhr
+# Route modules under backend/routes, imported lazily by create_app() so a
+# caller that only needs a subset doesn't import every schema and mapper.
+ROUTE_MODULES = (
+    "operation_type",
+    "machines",
+    "dimensions",
+    "duties",
+    "materials",
+    "machine_selection",
+    "mhr",
+    "cost_estimation",
 )
 
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(title="HAL Cost Estimation API")
-
-# CORS CONFIGURATION
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",
-        "http://localhost:5173",
-        "http://127.0.0.1:5173",
-        "http://127.0.0.1:3000",
-        "http://192.168.137.1:5173",   # optional (LAN)
-    ],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+DEFAULT_CORS_ORIGINS = (
+    "http://localhost:3000",
+    "http://localhost:5173",
+    "http://127.0.0.1:5173",
+    "http://127.0.0.1:3000",
+    "http://192.168.137.1:5173",   # optional (LAN)
 )
 
-app.include_router(operation_type.router)
-app.include_router(machines.router)
-app.include_router(dimensions.router)
-app.include_router(duties.router)
-app.include_router(materials.router)
-app.include_router(machine_selection.router)
-app.include_router(mhr.router)
-app.include_router(cost_estimation.router)
-@app.get("/")
-def root():
-    return {"status": "HAL Cost Estimation Backend Running 🚀"}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Dev convenience; set AUTO_CREATE_TABLES=0 where the schema is managed
+    # out of band so worker start-up skips the DDL round-trip.
+    if os.getenv("AUTO_CREATE_TABLES", "1").strip().lower() not in ("0", "false", "no"):
+        Base.metadata.create_all(bind=engine)
+    yield
+
+
+def _cors_origins() -> list:
+    """Comma-separated CORS_ORIGINS env var, falling back to the dev defaults"""
+    raw = os.getenv("CORS_ORIGINS")
+    if not raw:
+        return list(DEFAULT_CORS_ORIGINS)
+    return [o.strip() for o in raw.split(",") if o.strip()]
+
+
+def create_app(route_modules: tuple = ROUTE_MODULES) -> FastAPI:
+    app = FastAPI(
+        title="HAL Cost Estimation API",
+        lifespan=lifespan,
+    )
+
+    # CORS CONFIGURATION
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=_cors_origins(),
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    for name in route_modules:
+        app.include_router(import_module(f".routes.{name}", __package__).router)
+
+    @app.get("/")
+    def root():
+        return {"status": "HAL Cost Estimation Backend Running 🚀"}
+
+    return app
+
+
+app = create_app()
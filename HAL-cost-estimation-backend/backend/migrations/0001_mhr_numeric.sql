@@ -0,0 +1,101 @@
+-- 0001: MHR cost columns VARCHAR -> NUMERIC(12,2)  (PostgreSQL)
+--
+-- models.MHR declares investment_cost, elect_power_rating, elect_power_charges,
+-- available_hrs_per_annum, utilization_hrs_year and machine_hr_rate as
+-- Numeric(12, 2). create_all() does not alter existing tables, so databases
+-- created before that change still hold these as VARCHAR, and every read of
+-- them fails with "Unknown PG numeric type" until this script is run.
+--
+-- Run once, with the API stopped:
+--
+--     psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f backend/migrations/0001_mhr_numeric.sql
+--
+-- Values are cleaned before the cast: surrounding/embedded whitespace,
+-- thousands separators ("1,50,000", "150,000") and a leading "Rs"/"Rs."/"₹"
+-- are stripped, then rounded to 2 decimals. Anything still not a number, or
+-- too large for NUMERIC(12,2), becomes NULL; its original text is kept in
+-- mhr_numeric_rejects so it can be re-entered through the MHR form.
+--
+-- To see what would be rejected before migrating, run only the CREATE
+-- FUNCTION statement below and then:
+--
+--     SELECT id, machine_hr_rate FROM mhr
+--     WHERE nullif(trim(machine_hr_rate), '') IS NOT NULL
+--       AND pg_temp.mhr_to_numeric(machine_hr_rate) IS NULL;
+--
+-- (repeat per column). Re-running the script is a no-op for columns that are
+-- already numeric.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS mhr_numeric_rejects (
+    mhr_id      integer     NOT NULL,
+    column_name text        NOT NULL,
+    raw_value   text,
+    rejected_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE OR REPLACE FUNCTION pg_temp.mhr_to_numeric(raw text) RETURNS numeric
+LANGUAGE plpgsql IMMUTABLE AS $$
+DECLARE
+    cleaned text;
+    val     numeric;
+BEGIN
+    IF raw IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    cleaned := regexp_replace(lower(trim(raw)), '^(rs\.?|₹)', '');
+    cleaned := regexp_replace(cleaned, '[[:space:],]', '', 'g');
+
+    IF cleaned !~ '^[+-]?([0-9]+(\.[0-9]*)?|\.[0-9]+)$' THEN
+        RETURN NULL;
+    END IF;
+
+    val := round(cleaned::numeric, 2);
+    IF abs(val) >= 1e10 THEN  -- NUMERIC(12,2) holds at most 10 integer digits
+        RETURN NULL;
+    END IF;
+    RETURN val;
+END
+$$;
+
+DO $$
+DECLARE
+    col text;
+BEGIN
+    FOREACH col IN ARRAY ARRAY[
+        'investment_cost',
+        'elect_power_rating',
+        'elect_power_charges',
+        'available_hrs_per_annum',
+        'utilization_hrs_year',
+        'machine_hr_rate'
+    ] LOOP
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema()
+              AND table_name = 'mhr'
+              AND column_name = col
+              AND data_type IN ('character varying', 'text')
+        ) THEN
+            EXECUTE format(
+                'INSERT INTO mhr_numeric_rejects (mhr_id, column_name, raw_value)
+                 SELECT id, %L, %I FROM mhr
+                 WHERE nullif(trim(%I), '''') IS NOT NULL
+                   AND pg_temp.mhr_to_numeric(%I) IS NULL',
+                col, col, col, col
+            );
+            EXECUTE format(
+                'ALTER TABLE mhr ALTER COLUMN %I TYPE NUMERIC(12,2) USING pg_temp.mhr_to_numeric(%I)',
+                col, col
+            );
+        END IF;
+    END LOOP;
+END
+$$;
+
+COMMIT;
+
+-- Rows that lost a value, if any:
+SELECT mhr_id, column_name, raw_value FROM mhr_numeric_rejects ORDER BY mhr_id, column_name;
@@ -0,0 +1,22 @@
+-- 0002: lookup indexes for MHR and machines  (PostgreSQL)
+--
+-- models.MHR declares ix_mhr_lookup on (op_type_id, duty_id, machine_id) and
+-- models.Machine indexes name. create_all() does not add indexes to tables
+-- that already exist, so databases created before these were declared lack
+-- them, and the exact MHR lookup and machine-by-name queries scan the whole
+-- table.
+--
+-- Run once; the API can stay up:
+--
+--     psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f backend/migrations/0002_mhr_indexes.sql
+--
+-- CONCURRENTLY builds each index without blocking writes, so this script must
+-- not be wrapped in a transaction. Re-running it is a no-op once both indexes
+-- exist. If a concurrent build is interrupted it leaves an INVALID index of
+-- the same name behind; DROP INDEX it and run the script again.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_mhr_lookup
+    ON mhr (op_type_id, duty_id, machine_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_machines_name
+    ON machines (name);
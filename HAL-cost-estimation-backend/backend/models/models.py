@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from ..db import Base
 
@@ -22,7 +22,7 @@ class Machine(Base):
     __tablename__ = "machines"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    name = Column(String, nullable=False)
+    name = Column(String, nullable=False, index=True)
     op_id = Column(Integer, ForeignKey("operation_type.id"))
 
     operation_type = relationship("OperationType", back_populates="machines")
@@ -91,19 +91,25 @@ class MachineSelection(Base):
 # -------------------------------------------------
 class MHR(Base):
     __tablename__ = "mhr"
+    # Cost calculation looks rates up by (operation type, duty, machine)
+    __table_args__ = (
+        Index("ix_mhr_lookup", "op_type_id", "duty_id", "machine_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     op_type_id = Column(Integer, ForeignKey("operation_type.id"))
     duty_id = Column(Integer, ForeignKey("duties.id"))
     machine_id = Column(Integer, ForeignKey("machines.id"))
 
-    investment_cost = Column(String)
-    elect_power_rating = Column(String)
-    elect_power_charges = Column(String)
-    available_hrs_per_annum = Column(String)
-    utilization_hrs_year = Column(String)
-    machine_hr_rate = Column(String)
-
-    operation_type = relationship("OperationType", back_populates="mhr")
-    duty = relationship("Duty", back_populates="mhr")
-    machine = relationship("Machine", back_populates="mhr")
+    # asdecimal=False: read back as float, not Decimal
+    investment_cost = Column(Numeric(12, 2, asdecimal=False))
+    elect_power_rating = Column(Numeric(12, 2, asdecimal=False))
+    elect_power_charges = Column(Numeric(12, 2, asdecimal=False))
+    available_hrs_per_annum = Column(Numeric(12, 2, asdecimal=False))
+    utilization_hrs_year = Column(Numeric(12, 2, asdecimal=False))
+    machine_hr_rate = Column(Numeric(12, 2, asdecimal=False))
+
+    # lazy="raise": callers must eager-load these explicitly (no silent N+1)
+    operation_type = relationship("OperationType", back_populates="mhr", lazy="raise")
+    duty = relationship("Duty", back_populates="mhr", lazy="raise")
+    machine = relationship("Machine", back_populates="mhr", lazy="raise")
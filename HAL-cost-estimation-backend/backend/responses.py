@@ -0,0 +1,14 @@
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class OrjsonResponse(JSONResponse):
+    """JSONResponse rendered with orjson, for routes that return a hand-built payload.
+
+    Routes with a response_model should keep the default response class: FastAPI
+    serializes those with Pydantic directly, which is faster than any custom class.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
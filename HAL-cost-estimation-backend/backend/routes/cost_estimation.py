@@ -1,18 +1,96 @@
+from math import pi
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from ..db import get_db
+from ..responses import OrjsonResponse
 from ..schemas.cost_schemas import (
     CostEstimationRequest, 
     CostEstimationResponse,
-    CostBreakdown
+    CostBreakdown,
+    ComponentDimensions,
+    DutyCategory,
+    MachineCategory
 )
-from ..services.cost_calculation_service import CostCalculationService
+from ..services.cost_calculation_service import CostCalculationService, round_costs
 
 router = APIRouter(prefix="/cost-estimation", tags=["Cost Estimation"])
 
+
+def _round_part(dims: ComponentDimensions):
+    dimensions_dict = {
+        "diameter": dims.diameter,
+        "length": dims.length
+    }
+    volume = 0.25 * pi * dims.diameter * dims.diameter * dims.length
+    return "round", dimensions_dict, volume
+
+
+def _rectangular_part(dims: ComponentDimensions):
+    dimensions_dict = {
+        "length": dims.length,
+        "breadth": dims.breadth,
+        "height": dims.height
+    }
+    volume = dims.length * dims.breadth * dims.height
+    return "rectangular", dimensions_dict, volume
+
+
+# ComponentDimensions.shape_key -> handler returning (shape, dimensions_dict, volume).
+# A diameter always means a round part; any other combination is rejected.
+SHAPE_HANDLERS = {
+    (True, False, False): _round_part,
+    (True, True, False): _round_part,
+    (True, False, True): _round_part,
+    (True, True, True): _round_part,
+    (False, True, True): _rectangular_part,
+}
+
+
+def _calculation_steps(man_hours: float, machine_hour_rate: float, wage_rate: float, cost_breakdown: dict) -> dict:
+    """Step-by-step explanation of the cost formula, returned with ?explain=true"""
+    return {
+        "step_1_inputs": {
+            "A_man_hours": man_hours,
+            "B_machine_hour_rate": machine_hour_rate,
+            "C_wage_rate": wage_rate
+        },
+        "step_2_basic_cost": {
+            "formula": "D = A × (B + C)",
+            "calculation": f"{man_hours} × ({machine_hour_rate} + {wage_rate})",
+            "result": cost_breakdown["basic_cost_per_unit"]
+        },
+        "step_3_overheads": {
+            "formula": "OH = 100% of C (which is just C)",
+            "calculation": f"{wage_rate}",
+            "result": cost_breakdown["overheads_per_unit"]
+        },
+        "step_4_profit": {
+            "formula": "Profit = 10% of (D + OH)",
+            "calculation": f"0.10 × ({cost_breakdown['basic_cost_per_unit']} + {cost_breakdown['overheads_per_unit']})",
+            "result": cost_breakdown["profit_per_unit"]
+        },
+        "step_5_packing_forwarding": {
+            "formula": "P&F = 2% of D",
+            "calculation": f"0.02 × {cost_breakdown['basic_cost_per_unit']}",
+            "result": cost_breakdown["packing_forwarding_per_unit"]
+        },
+        "step_6_unit_cost": {
+            "formula": "Unit Cost = D + OH + Profit + P&F",
+            "calculation": f"{cost_breakdown['basic_cost_per_unit']} + {cost_breakdown['overheads_per_unit']} + {cost_breakdown['profit_per_unit']} + {cost_breakdown['packing_forwarding_per_unit']}",
+            "result": cost_breakdown["unit_cost"]
+        },
+        "step_7_outsourcing_mhr": {
+            "formula": "Outsourcing MHR = B + 2C",
+            "calculation": f"{machine_hour_rate} + (2 × {wage_rate})",
+            "result": cost_breakdown["outsourcing_mhr"]
+        }
+    }
+
+
 @router.post("/calculate", response_model=CostEstimationResponse)
 def calculate_cost_estimation(
     request: CostEstimationRequest,
+    explain: bool = False,
     db: Session = Depends(get_db)
 ):
     """
@@ -27,6 +105,7 @@ def calculate_cost_estimation(
     
     ## Optional Inputs:
     - **duty_category**: Override auto-classification (light, medium, heavy)
+    - **explain** (query): Set `?explain=true` to include `calculation_steps`
     
     ## How to get machine_name:
     1. Call GET /machines/ to see all available machines
@@ -80,71 +159,57 @@ def calculate_cost_estimation(
     - Calculated volume
     - Duty classification
     - Complete cost breakdown per unit
-    - Step-by-step calculation explanation
+    - Step-by-step calculation explanation (only with `?explain=true`)
     """
     
     # Initialize service
     service = CostCalculationService(db)
-    
-    # Step 1: Get machine details from database by name
-    try:
-        machine_details = service.get_machine_details(request.machine_name, db)
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    
-    machine_name = machine_details["name"]
-    
-    # Step 2: Determine machine category from name
-    machine_category = service.determine_machine_category(machine_name)
+    material = request.material.value
+    operation = request.operation_type.value
     
     # Detect shape and prepare dimensions dict
     dims = request.dimensions
-    if dims.diameter is not None:
-        # Round part
-        shape = "round"
-        dimensions_dict = {
-            "diameter": dims.diameter,
-            "length": dims.length
-        }
-        volume = 3.14159 * (dims.diameter/2)**2 * dims.length
-    elif dims.breadth is not None and dims.height is not None:
-        # Rectangular part
-        shape = "rectangular"
-        dimensions_dict = {
-            "length": dims.length,
-            "breadth": dims.breadth,
-            "height": dims.height
-        }
-        volume = dims.length * dims.breadth * dims.height
-    else:
+    handler = SHAPE_HANDLERS.get(dims.shape_key)
+    if handler is None:
         raise HTTPException(
             status_code=400,
             detail="Invalid dimensions. Provide either (diameter + length) for round parts OR (length + breadth + height) for rectangular parts"
         )
+    shape, dimensions_dict, volume = handler(dims)
     
-    # Step 3: Determine duty category
+    # Step 1: Determine duty category
     if request.duty_category:
         duty = request.duty_category.value
     else:
         duty = service.determine_duty_category(
             shape=shape,
             dimensions=dimensions_dict,
-            material=request.material.value,
-            operation=request.operation_type.value
+            material=material,
+            operation=operation
         )
     
-    # Step 4: Get Machine Hour Rate (B)
+    # Step 2: Get machine details and its Machine Hour Rate (B) in one query
     try:
-        machine_hour_rate = service.get_machine_hour_rate(
-            operation=request.operation_type.value,
-            duty=duty,
-            machine_name=machine_name,
-            db=db,
-            machine_id=machine_details.get("id"),
-            op_type_id=machine_details.get("operation_type_id"),
-        )
+        machine_details, machine_hour_rate = service.resolve_pricing(request.machine_name, duty)
     except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    machine_name = machine_details["name"]
+    
+    # Step 3: Determine machine category from name
+    machine_category = service.determine_machine_category(machine_name)
+    
+    # Step 4: resolve_pricing already ruled out the exact MHR row for this machine;
+    # go straight to the normalized name lookup
+    if machine_hour_rate is None:
+        try:
+            machine_hour_rate = service.get_fallback_machine_hour_rate(
+                operation=operation,
+                duty=duty,
+                machine_name=machine_name,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     
     # Step 5: Get Wage Rate (C)
     wage_rate = service.get_wage_rate(machine_name)
@@ -152,65 +217,32 @@ def calculate_cost_estimation(
     # Step 6: Get Man-hours (A) from input
     man_hours = request.man_hours_per_unit
     
-    # Step 7: Calculate all costs
-    cost_breakdown = service.calculate_costs(
+    # Step 7: Calculate all costs (rounded once here, for the steps and the response)
+    cost_breakdown = round_costs(service.calculate_costs(
         man_hours=man_hours,
         machine_hour_rate=machine_hour_rate,
         wage_rate=wage_rate,
         quantity=1  # Always calculate per unit
-    )
+    ))
     
     # Remove total_cost since we're calculating per unit
     cost_breakdown.pop('total_cost', None)
     
-    # Step 8: Create calculation explanation
-    calculation_steps = {
-        "step_1_inputs": {
-            "A_man_hours": man_hours,
-            "B_machine_hour_rate": machine_hour_rate,
-            "C_wage_rate": wage_rate
-        },
-        "step_2_basic_cost": {
-            "formula": "D = A × (B + C)",
-            "calculation": f"{man_hours} × ({machine_hour_rate} + {wage_rate})",
-            "result": cost_breakdown["basic_cost_per_unit"]
-        },
-        "step_3_overheads": {
-            "formula": "OH = 100% of C (which is just C)",
-            "calculation": f"{wage_rate}",
-            "result": cost_breakdown["overheads_per_unit"]
-        },
-        "step_4_profit": {
-            "formula": "Profit = 10% of (D + OH)",
-            "calculation": f"0.10 × ({cost_breakdown['basic_cost_per_unit']} + {cost_breakdown['overheads_per_unit']})",
-            "result": cost_breakdown["profit_per_unit"]
-        },
-        "step_5_packing_forwarding": {
-            "formula": "P&F = 2% of D",
-            "calculation": f"0.02 × {cost_breakdown['basic_cost_per_unit']}",
-            "result": cost_breakdown["packing_forwarding_per_unit"]
-        },
-        "step_6_unit_cost": {
-            "formula": "Unit Cost = D + OH + Profit + P&F",
-            "calculation": f"{cost_breakdown['basic_cost_per_unit']} + {cost_breakdown['overheads_per_unit']} + {cost_breakdown['profit_per_unit']} + {cost_breakdown['packing_forwarding_per_unit']}",
-            "result": cost_breakdown["unit_cost"]
-        },
-        "step_7_outsourcing_mhr": {
-            "formula": "Outsourcing MHR = B + 2C",
-            "calculation": f"{machine_hour_rate} + (2 × {wage_rate})",
-            "result": cost_breakdown["outsourcing_mhr"]
-        }
-    }
+    # Step 8: Create calculation explanation (opt-in; skipped for programmatic clients)
+    calculation_steps = (
+        _calculation_steps(man_hours, machine_hour_rate, wage_rate, cost_breakdown)
+        if explain else None
+    )
     
-    # Prepare response
-    response = CostEstimationResponse(
-        duty_category=duty,
+    # Prepare response (every value is already typed, so skip re-validation)
+    response = CostEstimationResponse.model_construct(
+        duty_category=DutyCategory(duty),
         selected_machine=machine_details,
-        machine_category=machine_category,
+        machine_category=MachineCategory(machine_category),
         shape=shape,
         dimensions=dimensions_dict,
         volume=round(volume, 2),
-        cost_breakdown=CostBreakdown(**cost_breakdown),
+        cost_breakdown=CostBreakdown.model_construct(**cost_breakdown),
         material=request.material,
         operation_type=request.operation_type,
         calculation_steps=calculation_steps
@@ -219,7 +251,7 @@ def calculate_cost_estimation(
     return response
 
 
-@router.post("/quick-estimate", response_model=dict)
+@router.post("/quick-estimate", response_class=OrjsonResponse)
 def quick_estimate(
     operation: str,
     duty: str,
@@ -241,7 +273,7 @@ def quick_estimate(
     )
 
     try:
-        machine_details = service.get_machine_details(machine_name, db)
+        machine_details = service.get_machine_details(machine_name)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
@@ -250,7 +282,6 @@ def quick_estimate(
             operation=operation,
             duty=duty,
             machine_name=machine_name,
-            db=db,
             machine_id=machine_details.get("id"),
             op_type_id=machine_details.get("operation_type_id"),
         )
@@ -260,18 +291,19 @@ def quick_estimate(
     wage_rate = service.get_wage_rate(machine_name)
     man_hours = service.calculate_man_hours(operation, duty)
     
-    cost_breakdown = service.calculate_costs(
+    cost_breakdown = round_costs(service.calculate_costs(
         man_hours=man_hours,
         machine_hour_rate=machine_hour_rate,
         wage_rate=wage_rate,
         quantity=quantity
-    )
+    ))
     
-    return {
+    # Already plain, rounded JSON values: skip jsonable_encoder entirely
+    return OrjsonResponse(content={
         "machine": machine_name,
         "duty": duty,
         "quantity": quantity,
         "unit_cost": cost_breakdown["unit_cost"],
         "total_cost": cost_breakdown["total_cost"],
         "details": cost_breakdown
-    }
\ No newline at end of file
+    })
\ No newline at end of file
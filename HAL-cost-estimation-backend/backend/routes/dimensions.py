@@ -8,7 +8,7 @@ router = APIRouter(prefix="/dimensions", tags=["Dimensions"])
 
 @router.post("/", response_model=DimensionOut)
 def create(data: DimensionCreate, db: Session = Depends(get_db)):
-    obj = Dimension(**data.dict())
+    obj = Dimension(**data.model_dump())
     db.add(obj)
     db.commit()
     db.refresh(obj)
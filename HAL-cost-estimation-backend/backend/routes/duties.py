@@ -8,7 +8,7 @@ router = APIRouter(prefix="/duties", tags=["Duties"])
 
 @router.post("/", response_model=DutyOut)
 def create(data: DutyCreate, db: Session = Depends(get_db)):
-    obj = Duty(**data.dict())
+    obj = Duty(**data.model_dump())
     db.add(obj)
     db.commit()
     db.refresh(obj)
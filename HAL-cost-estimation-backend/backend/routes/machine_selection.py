@@ -8,7 +8,7 @@ router = APIRouter(prefix="/machine-selection", tags=["Machine Selection"])
 
 @router.post("/", response_model=MachineSelectionOut)
 def create(data: MachineSelectionCreate, db: Session = Depends(get_db)):
-    obj = MachineSelection(**data.dict())
+    obj = MachineSelection(**data.model_dump())
     db.add(obj)
     db.commit()
     db.refresh(obj)
@@ -40,7 +40,7 @@ def update(id: int, data: MachineSelectionCreate, db: Session = Depends(get_db))
     obj = db.get(MachineSelection, id)
     if not obj:
         raise HTTPException(404, "Machine Selection not found")
-    for k, v in data.dict().items():
+    for k, v in data.model_dump().items():
         setattr(obj, k, v)
     db.commit()
     db.refresh(obj)
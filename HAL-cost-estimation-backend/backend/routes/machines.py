@@ -8,7 +8,7 @@ router = APIRouter(prefix="/machines", tags=["Machines"])
 
 @router.post("/", response_model=MachineOut)
 def create(data: MachineCreate, db: Session = Depends(get_db)):
-    obj = Machine(**data.dict())
+    obj = Machine(**data.model_dump())
     db.add(obj)
     db.commit()
     db.refresh(obj)
@@ -8,7 +8,7 @@ router = APIRouter(prefix="/materials", tags=["Materials"])
 
 @router.post("/", response_model=MaterialOut)
 def create(data: MaterialCreate, db: Session = Depends(get_db)):
-    obj = Material(**data.dict())
+    obj = Material(**data.model_dump())
     db.add(obj)
     db.commit()
     db.refresh(obj)
@@ -1,47 +1,115 @@
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from fastapi.responses import StreamingResponse
+import orjson
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, raiseload, selectinload
 from ..db import get_db
+from ..responses import OrjsonResponse
 from ..models.models import MHR, Machine
-from ..schemas.schemas import MHRCreate, MHROut
+from ..schemas.schemas import MHRCreate, MHROut, MachineOut, DutyOut, OperationTypeOut
 router = APIRouter(prefix="/mhr", tags=["MHR"])
 
+
+def _operation_type_out(op) -> Optional[OperationTypeOut]:
+    if op is None:
+        return None
+    return OperationTypeOut.model_construct(id=op.id, operation_name=op.operation_name)
+
+
+def _to_mhr_out(obj: MHR) -> MHROut:
+    """Map an eager-loaded MHR row to MHROut without running validators (trusted DB data)"""
+    duty = obj.duty
+    machine = obj.machine
+    return MHROut.model_construct(
+        id=obj.id,
+        op_type_id=obj.op_type_id,
+        duty_id=obj.duty_id,
+        machine_id=obj.machine_id,
+        investment_cost=obj.investment_cost,
+        elect_power_rating=obj.elect_power_rating,
+        elect_power_charges=obj.elect_power_charges,
+        available_hrs_per_annum=obj.available_hrs_per_annum,
+        utilization_hrs_year=obj.utilization_hrs_year,
+        machine_hr_rate=obj.machine_hr_rate,
+        operation_type=_operation_type_out(obj.operation_type),
+        duty=DutyOut.model_construct(id=duty.id, name=duty.name) if duty is not None else None,
+        machine=MachineOut.model_construct(
+            id=machine.id,
+            name=machine.name,
+            op_id=machine.op_id,
+            operation_type=_operation_type_out(machine.operation_type),
+        ) if machine is not None else None,
+    )
+
+
+# selectinload for the list: one extra SELECT per relationship instead of a wide JOIN.
+# raiseload("*") turns any relationship outside the eager set into an error (no N+1).
+# Built once at import; SQLAlchemy caches its compiled form.
+_MHR_LIST_STMT = select(MHR).options(
+    selectinload(MHR.operation_type),
+    selectinload(MHR.duty),
+    selectinload(MHR.machine).selectinload(Machine.operation_type),
+    raiseload("*")
+)
+
+
+def _load_one(db: Session, id: int, refresh: bool = False) -> Optional[MHR]:
+    stmt = select(MHR).options(
+        joinedload(MHR.operation_type),
+        joinedload(MHR.duty),
+        joinedload(MHR.machine).joinedload(Machine.operation_type),
+        raiseload("*")
+    ).where(MHR.id == id)
+    if refresh:
+        # expire_on_commit=False keeps the just-written object in the identity map
+        # with the client's values; re-read what the database actually stored
+        # (e.g. NUMERIC(12,2) rounding).
+        stmt = stmt.execution_options(populate_existing=True)
+    return db.execute(stmt).scalars().unique().first()
+
+
 @router.post("/", response_model=MHROut)
 def create(data: MHRCreate, db: Session = Depends(get_db)):
-    obj = MHR(**data.dict())
+    obj = MHR(**data.model_dump(exclude_unset=True))
     db.add(obj)
     db.commit()
-    db.refresh(obj)
-    return obj
+    return _load_one(db, obj.id, refresh=True)
 
-@router.get("/", response_model=list[MHROut])
+# Rows come straight from the DB, so skip response_model validation and keep
+# the schema in OpenAPI via `responses` instead.
+@router.get("/", response_model=None, response_class=StreamingResponse, responses={200: {"model": list[MHROut], "content": {"application/json": {}}}})
 def get_all(db: Session = Depends(get_db)):
-    return db.query(MHR).options(
-        joinedload(MHR.operation_type),
-        joinedload(MHR.duty),
-        joinedload(MHR.machine).joinedload(Machine.operation_type)
-    ).all()
+    # Stream the JSON array in batches of rows rather than materializing the whole
+    # table; the request session stays open until the response has been sent.
+    def gen():
+        yield b"["
+        rows = db.execute(_MHR_LIST_STMT.execution_options(yield_per=500)).scalars()
+        for i, obj in enumerate(rows):
+            if i:
+                yield b","
+            yield orjson.dumps(_to_mhr_out(obj).model_dump())
+        yield b"]"
+
+    return StreamingResponse(gen(), media_type="application/json")
 
-@router.get("/{id}", response_model=MHROut)
+@router.get("/{id}", response_model=None, response_class=OrjsonResponse, responses={200: {"model": MHROut}})
 def get_one(id: int, db: Session = Depends(get_db)):
-    obj = db.query(MHR).options(
-        joinedload(MHR.operation_type),
-        joinedload(MHR.duty),
-        joinedload(MHR.machine).joinedload(Machine.operation_type)
-    ).filter(MHR.id == id).first()
+    obj = _load_one(db, id)
     if not obj:
         raise HTTPException(404, "MHR not found")
-    return obj
+    return OrjsonResponse(_to_mhr_out(obj).model_dump())
 
 @router.put("/{id}", response_model=MHROut)
 def update(id: int, data: MHRCreate, db: Session = Depends(get_db)):
     obj = db.get(MHR, id)
     if not obj:
         raise HTTPException(404, "MHR not found")
-    for k, v in data.dict().items():
+    # Only the fields the client sent: fewer dirty attributes, smaller UPDATE
+    for k, v in data.model_dump(exclude_unset=True).items():
         setattr(obj, k, v)
     db.commit()
-    db.refresh(obj)
-    return obj
+    return _load_one(db, id, refresh=True)
 
 @router.delete("/{id}")
 def delete(id: int, db: Session = Depends(get_db)):
@@ -8,7 +8,7 @@ router = APIRouter(prefix="/operation-type", tags=["Operation Type"])
 
 @router.post("/", response_model=OperationTypeOut)
 def create(data: OperationTypeCreate, db: Session = Depends(get_db)):
-    obj = OperationType(**data.dict())
+    obj = OperationType(**data.model_dump())
     db.add(obj)
     db.commit()
     db.refresh(obj)
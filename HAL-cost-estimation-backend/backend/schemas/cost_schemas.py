@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
 from typing import Optional, Literal
 from enum import Enum
 
@@ -48,6 +48,16 @@ class ComponentDimensions(BaseModel):
     # For rectangular parts (milling, grinding, etc.)
     breadth: Optional[float] = Field(None, gt=0, description="Breadth/Width in mm (required for milling/grinding)")
     height: Optional[float] = Field(None, gt=0, description="Height in mm (required for milling/grinding)")
+
+    # (has diameter, has breadth, has height), computed once after validation
+    _shape_key: tuple = PrivateAttr(default=(False, False, False))
+
+    def model_post_init(self, __context) -> None:
+        self._shape_key = (self.diameter is not None, self.breadth is not None, self.height is not None)
+
+    @property
+    def shape_key(self) -> tuple:
+        return self._shape_key
     
     class Config:
         json_schema_extra = {
@@ -176,7 +186,7 @@ class CostEstimationResponse(BaseModel):
     operation_type: OperationType
     
     # Calculation Explanation
-    calculation_steps: dict = Field(..., description="Step-by-step calculation breakdown")
+    calculation_steps: Optional[dict] = Field(None, description="Step-by-step calculation breakdown (only with ?explain=true)")
 
     class Config:
         json_schema_extra = {
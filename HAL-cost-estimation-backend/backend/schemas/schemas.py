@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from typing import Optional
 
 # -------------------------------------------------
@@ -114,12 +114,28 @@ class MHRBase(BaseModel):
     op_type_id: Optional[int] = None      # ✅ CHANGED: Made optional
     duty_id: Optional[int] = None         # ✅ CHANGED: Made optional
     machine_id: Optional[int] = None      # ✅ CHANGED: Made optional
-    investment_cost: Optional[str] = None
-    elect_power_rating: Optional[str] = None
-    elect_power_charges: Optional[str] = None
-    available_hrs_per_annum: Optional[str] = None
-    utilization_hrs_year: Optional[str] = None
-    machine_hr_rate: Optional[str] = None
+    investment_cost: Optional[float] = None
+    elect_power_rating: Optional[float] = None
+    elect_power_charges: Optional[float] = None
+    available_hrs_per_annum: Optional[float] = None
+    utilization_hrs_year: Optional[float] = None
+    machine_hr_rate: Optional[float] = None
+
+    @field_validator(
+        'investment_cost',
+        'elect_power_rating',
+        'elect_power_charges',
+        'available_hrs_per_annum',
+        'utilization_hrs_year',
+        'machine_hr_rate',
+        mode='before',
+    )
+    @classmethod
+    def blank_to_none(cls, v):
+        """The configuration form submits empty inputs as ''"""
+        if isinstance(v, str) and not v.strip():
+            return None
+        return v
 
 class MHRCreate(MHRBase):
     pass
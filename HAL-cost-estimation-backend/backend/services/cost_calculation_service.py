@@ -1,7 +1,302 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+import re
+import threading
+import time
+from functools import lru_cache
+from math import pi
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy import and_, event, false, select, tuple_
 from ..models.models import MHR, Machine, Duty, OperationType as OperationTypeModel
-from typing import Tuple, Optional
+from typing import NamedTuple, Tuple, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # optional; determine_duty_category_batch falls back to the scalar path
+    np = None
+
+try:
+    from numba import njit
+except ImportError:  # optional; _score_to_duty then runs as plain Python
+    njit = None
+
+_NORM_TABLE = str.maketrans({"_": " ", "-": " "})
+_DUTY_SUFFIX = " duty"
+
+@lru_cache(maxsize=2048)
+def _norm(s: Optional[str]) -> str:
+    """Normalize a name for matching, e.g. "Medium duty" -> "medium", "Heat-Treatment" -> "heat treatment"."""
+    if s is None:
+        return ""
+    out = " ".join(s.translate(_NORM_TABLE).lower().split())
+    if out.endswith(_DUTY_SUFFIX):
+        out = out[: -len(_DUTY_SUFFIX)]
+    return out
+
+def _op_key(s: Optional[str]) -> str:
+    """Operation name as the MHR lookups compare it: trimmed, lower-case"""
+    return (s or "").strip().lower()
+
+class _LookupBundle(NamedTuple):
+    """Reference-data lookups shared by every service instance on an engine"""
+    # {operation key: id}, lowest id wins
+    op_ids: dict
+    # {normalized duty name: id}, first row wins (matching the old linear scan)
+    duty_ids: dict
+    # {(operation key, normalized duty name): ({machine_norm: rate}, ((machine_norm, rate), ...))}
+    # over every MHR row whose operation type, duty and machine exist, in id order.
+    # Keyed by duty *name* so rows under "Medium duty" and "medium" pool together.
+    mhr_index: dict
+    # Memo {(operation key, duty name, machine_norm): rate or None} filled by
+    # _fallback_mhr_rate; it lives and expires with the bundle
+    fallback_rates: dict
+
+# Engine -> (expires_at, bundle). The TTL bounds staleness when another worker
+# process, a script or raw SQL edits the reference tables; in-process commits
+# invalidate immediately. A bundle whose load started before the latest
+# invalidation is never stored, so a slow load can't re-cache pre-commit rows.
+LOOKUP_CACHE_TTL_SECONDS = 300.0
+FALLBACK_MEMO_MAX_ENTRIES = 1024
+_lookup_bundles: dict = {}
+_lookup_generation = 0
+_lookup_lock = threading.Lock()
+
+def _lookup_bundle(bind) -> _LookupBundle:
+    """Reference-data lookups for an engine, cached for LOOKUP_CACHE_TTL_SECONDS"""
+    now = time.monotonic()
+    cached = _lookup_bundles.get(bind)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    generation = _lookup_generation
+    bundle = _load_lookup_bundle(bind)
+    with _lookup_lock:
+        if generation == _lookup_generation:
+            _lookup_bundles[bind] = (now + LOOKUP_CACHE_TTL_SECONDS, bundle)
+    return bundle
+
+def _invalidate_lookup_bundles() -> None:
+    global _lookup_generation
+    with _lookup_lock:
+        _lookup_generation += 1
+        _lookup_bundles.clear()
+
+def _load_lookup_bundle(bind) -> _LookupBundle:
+    """Load all lookup tables on one connection"""
+    with bind.connect() as conn:
+        op_rows = conn.execute(
+            select(OperationTypeModel.id, OperationTypeModel.operation_name)
+            .order_by(OperationTypeModel.id)
+        ).all()
+        duty_rows = conn.execute(select(Duty.id, Duty.name)).all()
+        mhr_rows = conn.execute(
+            select(OperationTypeModel.operation_name, Duty.name, Machine.name, MHR.machine_hr_rate)
+            .join(OperationTypeModel, MHR.op_type_id == OperationTypeModel.id)
+            .join(Duty, MHR.duty_id == Duty.id)
+            .join(Machine, MHR.machine_id == Machine.id)
+            .order_by(MHR.id)
+        ).all()
+
+    op_ids = {}
+    for op_id, name in op_rows:
+        if name is not None:
+            op_ids.setdefault(_op_key(name), op_id)
+
+    duty_ids = {}
+    for du_id, name in duty_rows:
+        duty_ids.setdefault(_norm(name), du_id)
+
+    grouped = {}
+    for op_name, du_name, m_name, rate in mhr_rows:
+        if op_name is None:
+            continue
+        grouped.setdefault((_op_key(op_name), _norm(du_name)), []).append((_norm(m_name), rate))
+
+    mhr_index = {}
+    for key, candidates in grouped.items():
+        exact = {}
+        for m_norm, rate in candidates:
+            exact.setdefault(m_norm, rate)
+        mhr_index[key] = (exact, tuple(candidates))
+
+    return _LookupBundle(op_ids=op_ids, duty_ids=duty_ids, mhr_index=mhr_index, fallback_rates={})
+
+def _fallback_mhr_rate(bind, op_key: str, duty_norm: str, machine_norm: str) -> Optional[float]:
+    """
+    Best rate among the MHR rows for (operation, duty) given a normalized machine name:
+    the first exact name match, else the first substring match either way, else the first row.
+    Machine naming can differ (e.g., "Conventional" vs "Conventional Lathe"), hence the tiers.
+    """
+    bundle = _lookup_bundle(bind)
+    key = (op_key, duty_norm, machine_norm)
+    try:
+        return bundle.fallback_rates[key]
+    except KeyError:
+        pass
+
+    rate = None
+    entry = bundle.mhr_index.get((op_key, duty_norm))
+    if entry is not None:
+        exact, candidates = entry
+        if machine_norm in exact:
+            rate = exact[machine_norm]
+        else:
+            rate = candidates[0][1]
+            if machine_norm:
+                for rec_machine, rec_rate in candidates:
+                    if rec_machine and (rec_machine in machine_norm or machine_norm in rec_machine):
+                        rate = rec_rate
+                        break
+    if len(bundle.fallback_rates) < FALLBACK_MEMO_MAX_ENTRIES:
+        bundle.fallback_rates[key] = rate
+    return rate
+
+def _resolve_duty_id(db: Session, duty: str) -> Optional[int]:
+    d_norm = _norm(duty)
+    if not d_norm:
+        return None
+    return _lookup_bundle(db.get_bind()).duty_ids.get(d_norm)
+
+_DUTY_ORDER = ("light", "medium", "heavy")
+
+def _bump(d: str, steps: int) -> str:
+    try:
+        idx = _DUTY_ORDER.index(d)
+    except ValueError:
+        idx = 0
+    return _DUTY_ORDER[min(len(_DUTY_ORDER) - 1, max(0, idx + steps))]
+
+def _adjust_duty(base: str, mat: str, op: str) -> str:
+    """Apply the material/operation bumps on top of the geometry-based duty"""
+    # Material adjustment (conservative): steel/titanium should not reduce duty.
+    if mat in {"steel", "titanium"}:
+        base = _bump(base, 1 if base == "light" else 0)
+        if mat == "titanium" and base == "medium":
+            base = _bump(base, 1)
+
+    # Operation adjustment (conservative): some ops are inherently more demanding.
+    if op in {"heat_treatment", "welding"}:
+        base = _bump(base, 1)
+
+    return base
+
+# (base duty, material, operation) -> final duty for every known combination,
+# so the hot path is a single dict hit. Unknown inputs fall back to _adjust_duty.
+DUTY_TABLE = {
+    (base, mat, op): _adjust_duty(base, mat, op)
+    for base in _DUTY_ORDER
+    for mat in ("aluminium", "steel", "titanium")
+    for op in (
+        "turning", "milling", "drilling", "grinding", "boring",
+        "heat_treatment", "welding", "surface_treatment",
+    )
+}
+
+# Volume-fallback factors, indexed by small integer codes. Unknown names map to
+# code 0, whose factor (1.0) is the old .get() default.
+_MAT_CODE = {"aluminium": 0, "steel": 1, "titanium": 2}
+_MAT_FACTOR = (1.0, 3.0, 1.7)
+
+_OP_CODE = {
+    "turning": 0,
+    "milling": 1,
+    "drilling": 2,
+    "grinding": 3,
+    "boring": 4,
+    "heat_treatment": 5,
+    "welding": 6,
+    "surface_treatment": 7,
+}
+_OP_FACTOR = (1.0, 1.5, 0.8, 1.2, 1.3, 2.0, 1.8, 1.0)
+
+def _score_to_duty(volume, mat_code, op_code):
+    """Volume-fallback score -> duty index (0 light, 1 medium, 2 heavy)"""
+    score = (volume / 1000000.0) * _MAT_FACTOR[mat_code] * _OP_FACTOR[op_code]
+    if score < 5:
+        return 0
+    if score < 20:
+        return 1
+    return 2
+
+if njit is not None:
+    _score_to_duty = njit(cache=True)(_score_to_duty)
+
+# Geometry thresholds used by determine_duty_category, as searchsorted edges:
+# value <= edges[0] -> light, <= edges[1] -> medium, else heavy.
+_RECT_MAX_DIM_EDGES = (750.0, 1500.0)
+_ROUND_DIAMETER_EDGES = (100.0, 300.0)
+_ROUND_LENGTH_EDGES = (300.0, 1200.0)
+
+# Category keywords, matched anywhere in the machine name like the old
+# substring checks ("5 axis"/"5-axis" already contain "5"). ASCII-only case
+# folding keeps parity with str.lower() for these patterns.
+_CNC_RE = re.compile(r"cnc|precision", re.I | re.A)
+_CNC5_RE = re.compile(r"5|five", re.I | re.A)
+_SPM_RE = re.compile(r"spm|special", re.I | re.A)
+
+@lru_cache(maxsize=256)
+def _machine_category(machine_name: str) -> str:
+    """Pure name -> category classifier; memoized since the set of machine names is small"""
+    if _CNC_RE.search(machine_name):
+        return "cnc_5axis" if _CNC5_RE.search(machine_name) else "cnc_3axis"
+    if _SPM_RE.search(machine_name):
+        return "spm"
+    return "conventional"
+
+@lru_cache(maxsize=256)
+def _wage_rate_for(machine_name: str) -> float:
+    """Machine name -> wage rate (C); memoized like _machine_category"""
+    svc = CostCalculationService
+    if _machine_category(machine_name) == "conventional":
+        monthly = svc.CONVENTIONAL_OPERATOR_MONTHLY_WAGE
+    else:
+        monthly = svc.CNC_OPERATOR_MONTHLY_WAGE
+    return monthly / svc.HOURS_PER_MONTH_FOR_WAGE
+
+# (operation, machine category) -> machine name used by select_machine
+_MACHINE_NAMES = {
+    ("turning", "conventional"): "Conventional Lathe",
+    ("turning", "cnc_3axis"): "CNC Lathe - 3 Axis",
+    ("turning", "cnc_5axis"): "CNC Lathe - 5 Axis",
+    ("turning", "spm"): "Special Purpose Lathe",
+    ("milling", "conventional"): "Conventional Milling Machine",
+    ("milling", "cnc_3axis"): "CNC Milling - 3 Axis",
+    ("milling", "cnc_5axis"): "CNC Milling - 5 Axis",
+    ("milling", "spm"): "Special Purpose Mill",
+    ("drilling", "conventional"): "Conventional Drill Press",
+    ("drilling", "cnc_3axis"): "CNC Drilling Machine",
+    ("drilling", "cnc_5axis"): "CNC Multi-Axis Drill",
+    ("drilling", "spm"): "Special Purpose Drill",
+    ("grinding", "conventional"): "Conventional Grinder",
+    ("grinding", "cnc_3axis"): "CNC Grinder",
+    ("grinding", "cnc_5axis"): "CNC Precision Grinder",
+    ("grinding", "spm"): "Special Purpose Grinder",
+    ("boring", "conventional"): "Conventional Boring Machine",
+    ("boring", "cnc_3axis"): "CNC Boring Machine",
+    ("boring", "cnc_5axis"): "CNC Horizontal Boring",
+    ("boring", "spm"): "Special Purpose Boring",
+}
+
+# Decimal places per calculate_costs key, applied once at the API boundary
+_COST_DECIMALS = {
+    "man_hours_per_unit": 4,
+    "machine_hour_rate": 2,
+    "wage_rate": 2,
+    "basic_cost_per_unit": 2,
+    "overheads_per_unit": 2,
+    "profit_per_unit": 2,
+    "packing_forwarding_per_unit": 2,
+    "unit_cost": 2,
+    "total_cost": 2,
+    "outsourcing_mhr": 2,
+}
+
+def round_costs(costs: dict) -> dict:
+    """Round a calculate_costs() result for display"""
+    return {k: round(v, _COST_DECIMALS.get(k, 2)) for k, v in costs.items()}
+
+# Machine name -> (expires_at, details). Shared across requests; the TTL bounds
+# staleness when another worker process edits the machines table.
+MACHINE_CACHE_TTL_SECONDS = 300.0
+_machine_details_cache: dict = {}
 
 class CostCalculationService:
     """Service class for manufacturing cost calculations"""
@@ -23,9 +318,22 @@ class CostCalculationService:
         "welding": {"light": 0.3, "medium": 0.6, "heavy": 1.2},
         "surface_treatment": {"light": 0.2, "medium": 0.4, "heavy": 0.8}
     }
-    
+
+    # (operation, duty) -> hours, so a lookup is a single hash probe
+    _MH_FLAT = {
+        (op, d): h
+        for op, inner in MAN_HOURS_MATRIX.items()
+        for d, h in inner.items()
+    }
+
     def __init__(self, db: Session):
         self.db = db
+
+    @classmethod
+    def invalidate_caches(cls) -> None:
+        """Drop cached reference data; call after writes to the configuration tables"""
+        _machine_details_cache.clear()
+        _invalidate_lookup_bundles()
     
     def determine_duty_category(
         self, 
@@ -37,14 +345,6 @@ class CostCalculationService:
         """
         Determine duty category based on dimensions, material, and operation
         """
-        def _bump(d: str, steps: int) -> str:
-            order = ["light", "medium", "heavy"]
-            try:
-                idx = order.index(d)
-            except ValueError:
-                idx = 0
-            return order[min(len(order) - 1, max(0, idx + steps))]
-
         op = (operation or "").strip().lower()
         mat = (material or "").strip().lower()
 
@@ -87,47 +387,81 @@ class CostCalculationService:
         if base is None:
             # Fallback to previous volume-based heuristic for unsupported shapes/inputs.
             if shape == "round":
-                volume = 3.14159 * (dimensions["diameter"]/2)**2 * dimensions["length"]
+                diameter = dimensions["diameter"]
+                volume = 0.25 * pi * diameter * diameter * dimensions["length"]
             else:
                 volume = dimensions["length"] * dimensions["breadth"] * dimensions["height"]
 
-            material_factor = {
-                "aluminium": 1.0,
-                "steel": 3.0,
-                "titanium": 1.7
-            }.get(mat, 1.0)
-
-            operation_factor = {
-                "turning": 1.0,
-                "milling": 1.5,
-                "drilling": 0.8,
-                "grinding": 1.2,
-                "boring": 1.3,
-                "heat_treatment": 2.0,
-                "welding": 1.8,
-                "surface_treatment": 1.0
-            }.get(op, 1.0)
-
-            score = (volume / 1000000) * material_factor * operation_factor
-
-            if score < 5:
-                base = "light"
-            elif score < 20:
-                base = "medium"
-            else:
-                base = "heavy"
+            base = _DUTY_ORDER[
+                _score_to_duty(float(volume), _MAT_CODE.get(mat, 0), _OP_CODE.get(op, 0))
+            ]
 
-        # Material adjustment (conservative): steel/titanium should not reduce duty.
-        if mat in {"steel", "titanium"}:
-            base = _bump(base, 1 if base == "light" else 0)
-            if mat == "titanium" and base == "medium":
-                base = _bump(base, 1)
+        duty = DUTY_TABLE.get((base, mat, op))
+        if duty is None:
+            duty = _adjust_duty(base, mat, op)
+        return duty
 
-        # Operation adjustment (conservative): some ops are inherently more demanding.
-        if op in {"heat_treatment", "welding"}:
-            base = _bump(base, 1)
+    def determine_duty_category_batch(
+        self,
+        shapes: Sequence[str],
+        dims: Sequence[dict],
+        materials: Sequence[str],
+        operations: Sequence[str]
+    ) -> list:
+        """
+        determine_duty_category over parallel sequences of parts, vectorized with NumPy.
+        Rows that need the volume fallback (or NaN dimensions) go through the scalar path.
+        """
+        if np is None or not shapes:
+            return [
+                self.determine_duty_category(s, d, m, o)
+                for s, d, m, o in zip(shapes, dims, materials, operations)
+            ]
+
+        n = len(shapes)
+        length = np.zeros(n)
+        breadth = np.zeros(n)
+        height = np.zeros(n)
+        diameter = np.zeros(n)
+        is_rect = np.zeros(n, dtype=bool)
+        is_round = np.zeros(n, dtype=bool)
+
+        for i, (shape, d) in enumerate(zip(shapes, dims)):
+            if shape == "rectangular" and all(k in d for k in ("length", "breadth", "height")):
+                length[i] = float(d["length"])
+                breadth[i] = float(d["breadth"])
+                height[i] = float(d["height"])
+                is_rect[i] = True
+            elif shape == "round" and all(k in d for k in ("diameter", "length")):
+                diameter[i] = float(d["diameter"])
+                length[i] = float(d["length"])
+                is_round[i] = True
+
+        # Python's max() is order-dependent with NaN, so leave those rows to the scalar path
+        has_nan = np.isnan(length) | np.isnan(breadth) | np.isnan(height) | np.isnan(diameter)
+        vectorized = (is_rect | is_round) & ~has_nan
 
-        return base
+        max_dim = np.maximum(np.maximum(length, breadth), height)
+        idx = np.where(
+            is_rect,
+            np.searchsorted(_RECT_MAX_DIM_EDGES, max_dim),
+            np.maximum(
+                np.searchsorted(_ROUND_DIAMETER_EDGES, diameter),
+                np.searchsorted(_ROUND_LENGTH_EDGES, length),
+            ),
+        )
+
+        # Same bumps as _adjust_duty: steel lifts light to medium, titanium is
+        # always heavy, heat treatment/welding add one step.
+        mat = np.array([(m or "").strip().lower() for m in materials])
+        op = np.array([(o or "").strip().lower() for o in operations])
+        idx = np.where(mat == "titanium", 2, np.where(mat == "steel", np.maximum(idx, 1), idx))
+        idx = np.minimum(idx + np.isin(op, ("heat_treatment", "welding")), 2)
+
+        out = np.array(_DUTY_ORDER)[idx].tolist()
+        for i in np.flatnonzero(~vectorized):
+            out[i] = self.determine_duty_category(shapes[i], dims[i], materials[i], operations[i])
+        return out
     
     def select_machine(
         self,
@@ -152,76 +486,75 @@ class CostCalculationService:
             else:
                 category = "conventional"
         
-        # Machine naming based on operation and category
-        machine_names = {
-            "turning": {
-                "conventional": "Conventional Lathe",
-                "cnc_3axis": "CNC Lathe - 3 Axis",
-                "cnc_5axis": "CNC Lathe - 5 Axis",
-                "spm": "Special Purpose Lathe"
-            },
-            "milling": {
-                "conventional": "Conventional Milling Machine",
-                "cnc_3axis": "CNC Milling - 3 Axis",
-                "cnc_5axis": "CNC Milling - 5 Axis",
-                "spm": "Special Purpose Mill"
-            },
-            "drilling": {
-                "conventional": "Conventional Drill Press",
-                "cnc_3axis": "CNC Drilling Machine",
-                "cnc_5axis": "CNC Multi-Axis Drill",
-                "spm": "Special Purpose Drill"
-            },
-            "grinding": {
-                "conventional": "Conventional Grinder",
-                "cnc_3axis": "CNC Grinder",
-                "cnc_5axis": "CNC Precision Grinder",
-                "spm": "Special Purpose Grinder"
-            },
-            "boring": {
-                "conventional": "Conventional Boring Machine",
-                "cnc_3axis": "CNC Boring Machine",
-                "cnc_5axis": "CNC Horizontal Boring",
-                "spm": "Special Purpose Boring"
-            }
-        }
-        
-        machine_name = machine_names.get(operation, {}).get(
-            category, 
+        machine_name = _MACHINE_NAMES.get(
+            (operation, category),
             f"{category.upper()} Machine"
         )
         
         return machine_name, category
     
-    def get_machine_details(self, machine_name: str, db: Session) -> dict:
+    def get_machine_details(self, machine_name: str) -> dict:
         """
-        Get machine details from database by name
+        Get machine details from database by name (cached per process)
         """
-        machine = db.query(Machine).filter(Machine.name == machine_name).first()
-        if not machine:
+        now = time.monotonic()
+        cached = _machine_details_cache.get(machine_name)
+        if cached is not None and cached[0] > now:
+            return dict(cached[1])
+
+        row = self.db.execute(
+            select(Machine.id, Machine.name, Machine.op_id).where(Machine.name == machine_name)
+        ).first()
+        if row is None:
             raise ValueError(f"Machine with name '{machine_name}' not found")
         
-        return {
+        details = {
+            "id": row.id,
+            "name": row.name,
+            "operation_type_id": row.op_id
+        }
+        _machine_details_cache[machine_name] = (now + MACHINE_CACHE_TTL_SECONDS, details)
+        return dict(details)
+    
+    def resolve_pricing(self, machine_name: str, duty: str) -> Tuple[dict, Optional[float]]:
+        """
+        Resolve machine details and its MHR for the given duty in a single query.
+
+        Returns (machine_details, machine_hr_rate). The rate is None when no MHR row
+        matches the machine on its own operation type; callers then fall back to
+        get_machine_hour_rate.
+        """
+        du_id = _resolve_duty_id(self.db, duty)
+        rate_join = and_(
+            MHR.machine_id == Machine.id,
+            MHR.op_type_id == Machine.op_id,
+            MHR.duty_id == du_id if du_id is not None else false(),
+        )
+        rows = self.db.execute(
+            select(Machine.id, Machine.name, Machine.op_id, MHR.machine_hr_rate)
+            .outerjoin(MHR, rate_join)
+            .where(Machine.name == machine_name)
+        ).all()
+        if not rows:
+            raise ValueError(f"Machine with name '{machine_name}' not found")
+
+        machine = rows[0]
+        details = {
             "id": machine.id,
             "name": machine.name,
             "operation_type_id": machine.op_id
         }
-    
+
+        for row in rows:
+            if row.id == machine.id and row.machine_hr_rate is not None:
+                return details, row.machine_hr_rate
+        return details, None
+
     def determine_machine_category(self, machine_name: str) -> str:
         """
         Determine machine category from machine name
         """
-        name_lower = machine_name.lower()
-        
-        if "cnc" in name_lower or "precision" in name_lower:
-            if "5" in name_lower or "five" in name_lower or "5 axis" in name_lower or "5-axis" in name_lower:
-                return "cnc_5axis"
-            else:
-                return "cnc_3axis"
-        elif "spm" in name_lower or "special" in name_lower:
-            return "spm"
-        else:
-            return "conventional"
+        return _machine_category(machine_name)
 
     def get_wage_rate(self, machine_name: str) -> float:
         """Get Wage Rate (C) in ₹/hr based on selected machine.
@@ -230,19 +563,13 @@ class CostCalculationService:
         Conventional machine operators : 15000 per month
         CNC/Precision machine operators : 20000 per month
         """
-        category = self.determine_machine_category(machine_name)
-        if category == "conventional":
-            monthly = self.CONVENTIONAL_OPERATOR_MONTHLY_WAGE
-        else:
-            monthly = self.CNC_OPERATOR_MONTHLY_WAGE
-        return monthly / self.HOURS_PER_MONTH_FOR_WAGE
+        return _wage_rate_for(machine_name)
     
     def get_machine_hour_rate(
         self,
         operation: str,
         duty: str,
         machine_name: str,
-        db: Session,
         machine_id: Optional[int] = None,
         op_type_id: Optional[int] = None,
         duty_id: Optional[int] = None,
@@ -250,114 +577,69 @@ class CostCalculationService:
         """
         Fetch Machine Hour Rate from database or calculate default
         """
-        def _norm(s: Optional[str]) -> str:
-            if s is None:
-                return ""
-            out = s.strip().lower()
-            out = out.replace("_", " ")
-            out = out.replace("-", " ")
-            out = " ".join(out.split())
-            if out.endswith(" duty"):
-                out = out[: -len(" duty")]
-            return out
-
-        def _resolve_duty_id(d: str) -> Optional[int]:
-            d_norm = _norm(d)
-            if not d_norm:
-                return None
-            try:
-                duties = db.query(Duty).all()
-            except Exception:
-                return None
-            for du in duties:
-                if _norm(getattr(du, "name", None)) == d_norm:
-                    return du.id
-            return None
-
         # Prefer deterministic lookup by IDs (matches configuration table exactly)
-        try:
-            op_id = op_type_id
-            if op_id is None and operation:
-                op_row = (
-                    db.query(OperationTypeModel)
-                    .filter(func.lower(func.trim(OperationTypeModel.operation_name)) == operation.strip().lower())
-                    .first()
-                )
-                op_id = op_row.id if op_row else None
-
-            du_id = duty_id if duty_id is not None else _resolve_duty_id(duty)
-            m_id = machine_id
-
-            if op_id is not None and du_id is not None and m_id is not None:
-                rec = (
-                    db.query(MHR)
-                    .filter(
-                        MHR.op_type_id == op_id,
-                        MHR.duty_id == du_id,
-                        MHR.machine_id == m_id,
-                    )
-                    .first()
+        op_id = op_type_id
+        if op_id is None:
+            op_key = _op_key(operation)
+            if op_key:
+                op_id = _lookup_bundle(self.db.get_bind()).op_ids.get(op_key)
+
+        du_id = duty_id if duty_id is not None else _resolve_duty_id(self.db, duty)
+        m_id = machine_id
+
+        if op_id is not None and du_id is not None and m_id is not None:
+            rate = self.db.execute(
+                select(MHR.machine_hr_rate).where(
+                    MHR.op_type_id == op_id,
+                    MHR.duty_id == du_id,
+                    MHR.machine_id == m_id,
                 )
-                if rec and rec.machine_hr_rate is not None:
-                    return float(rec.machine_hr_rate)
-        except Exception:
-            pass
+            ).scalar()
+            if rate is not None:
+                return rate
+
+        return self.get_fallback_machine_hour_rate(operation, duty, machine_name)
 
+    def get_fallback_machine_hour_rate(self, operation: str, duty: str, machine_name: str) -> float:
+        """
+        Machine Hour Rate by normalized name match only, for callers that have
+        already ruled out the exact (operation, duty, machine) row (e.g. resolve_pricing)
+        """
         # Prefer MHR configuration table values; do a normalized match to tolerate
         # differences like: "Medium duty" vs "medium", "Turning" vs "turning".
-        try:
-            op_norm = _norm(operation)
-            duty_norm = _norm(duty)
-            machine_norm = _norm(machine_name)
-
-            # Narrow candidates by operation+duty in SQL first. Machine naming can differ
-            # (e.g., "Conventional" vs "Conventional Lathe"), so we score matches in Python.
-            candidates = (
-                db.query(MHR)
-                .join(OperationTypeModel, MHR.op_type_id == OperationTypeModel.id)
-                .join(Duty, MHR.duty_id == Duty.id)
-                .join(Machine, MHR.machine_id == Machine.id)
-                .filter(func.lower(func.trim(OperationTypeModel.operation_name)) == operation.strip().lower())
-                .all()
-            )
-
-            best = None
-            best_score = -1
-            for rec in candidates:
-                rec_op = _norm(getattr(rec.operation_type, "operation_name", None))
-                rec_duty = _norm(getattr(rec.duty, "name", None))
-                if rec_op != op_norm or rec_duty != duty_norm:
-                    continue
-
-                rec_machine = _norm(getattr(rec.machine, "name", None))
-                # 2 = exact, 1 = substring match, 0 = mismatch
-                if rec_machine == machine_norm:
-                    score = 2
-                elif rec_machine and machine_norm and (rec_machine in machine_norm or machine_norm in rec_machine):
-                    score = 1
-                else:
-                    score = 0
-
-                if score > best_score:
-                    best = rec
-                    best_score = score
-
-                if best_score == 2:
-                    break
-
-            if best and best.machine_hr_rate is not None:
-                try:
-                    return float(best.machine_hr_rate)
-                except (ValueError, TypeError):
-                    pass
-        except Exception:
-            # If database query fails, use defaults
-            pass
+        # This matches on the duty *name*, across every Duty row that normalizes to it.
+        rate = _fallback_mhr_rate(self.db.get_bind(), _op_key(operation), _norm(duty), _norm(machine_name))
+        if rate is not None:
+            return rate
 
         raise ValueError(
             "MHR not configured for the selected operation, duty, and machine. "
             "Please add a matching row in the MHR configuration table."
         )
+
+    def get_machine_hour_rates_bulk(
+        self,
+        triples: Sequence[Tuple[int, int, int]]
+    ) -> dict:
+        """
+        Fetch Machine Hour Rates for many (op_type_id, duty_id, machine_id) triples in one query.
+        Returns {triple: rate}; triples without a configured rate are absent.
+        """
+        keys = set(triples)
+        if not keys:
+            return {}
+
+        rows = self.db.execute(
+            select(MHR.op_type_id, MHR.duty_id, MHR.machine_id, MHR.machine_hr_rate)
+            .where(tuple_(MHR.op_type_id, MHR.duty_id, MHR.machine_id).in_(keys))
+        ).all()
+
+        rates = {}
+        for op_id, du_id, m_id, rate in rows:
+            if rate is not None:
+                # First configured row wins, as in get_machine_hour_rate
+                rates.setdefault((op_id, du_id, m_id), rate)
+        return rates
     
     def calculate_man_hours(
         self,
@@ -368,10 +650,10 @@ class CostCalculationService:
         """
         Calculate or return man-hours per unit
         """
-        if override:
+        if override is not None:
             return override
-        
-        return self.MAN_HOURS_MATRIX.get(operation, {}).get(duty, 0.5)
+
+        return self._MH_FLAT.get((operation, duty), 0.5)
     
     def calculate_costs(
         self,
@@ -398,30 +680,88 @@ class CostCalculationService:
         # Overheads: OH = 100% of C × A = C × A
         overheads = wage_rate
         
-        # Profit: 10% of (D + OH)
-        profit = 0.10 * (basic_cost + overheads)
-        
-        # Packing & Forwarding: 2% of D
-        packing_forwarding = 0.02 * basic_cost
-        
-        # Unit cost
-        unit_cost = basic_cost + overheads + profit + packing_forwarding
+        # Unit cost: D + OH + 10% of (D + OH) + 2% of D, folded
+        unit_cost = basic_cost * 1.12 + overheads * 1.10
         
         # Total cost
         total_cost = unit_cost * quantity
         
         # Outsourcing MHR
-        outsourcing_mhr = machine_hour_rate + (2 * wage_rate)
+        outsourcing_mhr = machine_hour_rate + 2.0 * wage_rate
         
         return {
-            "man_hours_per_unit": round(man_hours, 4),
-            "machine_hour_rate": round(machine_hour_rate, 2),
-            "wage_rate": round(wage_rate, 2),
-            "basic_cost_per_unit": round(basic_cost, 2),
-            "overheads_per_unit": round(overheads, 2),
-            "profit_per_unit": round(profit, 2),
-            "packing_forwarding_per_unit": round(packing_forwarding, 2),
-            "unit_cost": round(unit_cost, 2),
-            "total_cost": round(total_cost, 2),
-            "outsourcing_mhr": round(outsourcing_mhr, 2)
-        }
\ No newline at end of file
+            "man_hours_per_unit": man_hours,
+            "machine_hour_rate": machine_hour_rate,
+            "wage_rate": wage_rate,
+            "basic_cost_per_unit": basic_cost,
+            "overheads_per_unit": overheads,
+            # Profit: 10% of (D + OH); Packing & Forwarding: 2% of D
+            "profit_per_unit": 0.10 * (basic_cost + overheads),
+            "packing_forwarding_per_unit": 0.02 * basic_cost,
+            "unit_cost": unit_cost,
+            "total_cost": total_cost,
+            "outsourcing_mhr": outsourcing_mhr
+        }
+
+    def calculate_costs_batch(
+        self,
+        man_hours: Sequence[float],
+        machine_hour_rate: Sequence[float],
+        wage_rate: Sequence[float],
+        quantity: Sequence[int]
+    ) -> dict:
+        """
+        calculate_costs over parallel sequences, vectorized with NumPy.
+        Returns the same keys as calculate_costs, each holding an array (lists without NumPy).
+        """
+        if np is None:
+            rows = [
+                self.calculate_costs(a, b, c, q)
+                for a, b, c, q in zip(man_hours, machine_hour_rate, wage_rate, quantity)
+            ]
+            return {k: [r[k] for r in rows] for k in _COST_DECIMALS}
+
+        a = np.asarray(man_hours, dtype=np.float64)
+        b = np.asarray(machine_hour_rate, dtype=np.float64)
+        c = np.asarray(wage_rate, dtype=np.float64)
+        q = np.asarray(quantity, dtype=np.float64)
+
+        basic_cost = a * (b + c)
+        # D + OH + 10% of (D + OH) + 2% of D, with OH = C
+        unit_cost = basic_cost * 1.12 + c * 1.10
+        return {
+            "man_hours_per_unit": a,
+            "machine_hour_rate": b,
+            "wage_rate": c,
+            "basic_cost_per_unit": basic_cost,
+            "overheads_per_unit": c,
+            "profit_per_unit": 0.10 * (basic_cost + c),
+            "packing_forwarding_per_unit": 0.02 * basic_cost,
+            "unit_cost": unit_cost,
+            "total_cost": unit_cost * q,
+            "outsourcing_mhr": b + 2.0 * c
+        }
+
+
+# ORM writes to the tables behind the caches above flag their session; the
+# caches are dropped once that session commits, so no request can re-cache
+# rows that are still uncommitted.
+_REFERENCE_DATA_DIRTY = "cost_reference_data_dirty"
+
+def _flag_reference_write(mapper, connection, target) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info[_REFERENCE_DATA_DIRTY] = True
+
+for _model in (MHR, Machine, Duty, OperationTypeModel):
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _flag_reference_write)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session) -> None:
+    if session.info.pop(_REFERENCE_DATA_DIRTY, False):
+        CostCalculationService.invalidate_caches()
+
+@event.listens_for(Session, "after_rollback")
+def _discard_flag_on_rollback(session) -> None:
+    session.info.pop(_REFERENCE_DATA_DIRTY, None)
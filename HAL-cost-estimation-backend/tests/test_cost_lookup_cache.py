@@ -0,0 +1,190 @@
+"""
+Lookup-cache behaviour of cost_calculation_service, on a throwaway SQLite file.
+
+Run from HAL-cost-estimation-backend with ``python -m pytest``.
+"""
+import random
+from types import SimpleNamespace
+from typing import Optional
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from backend.db import Base, get_db
+from backend.main import create_app
+from backend.models.models import MHR, Machine, Duty, OperationType
+import backend.services.cost_calculation_service as svc
+from backend.services.cost_calculation_service import CostCalculationService
+
+pytestmark = pytest.mark.filterwarnings("ignore:Dialect sqlite")
+
+
+@pytest.fixture
+def engine(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'cost.db'}")
+    Base.metadata.create_all(eng)
+    CostCalculationService.invalidate_caches()
+    yield eng
+    CostCalculationService.invalidate_caches()
+    eng.dispose()
+
+
+@pytest.fixture
+def make_session(engine):
+    return sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(svc, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def _seed(make_session, rate=10):
+    with make_session() as db:
+        db.add_all([
+            OperationType(id=1, operation_name="Turning"),
+            Duty(id=1, name="Light duty"),
+            Machine(id=1, name="CNC Lathe", op_id=1),
+            MHR(id=1, op_type_id=1, duty_id=1, machine_id=1, machine_hr_rate=rate),
+        ])
+        db.commit()
+
+
+def _fallback_rate(make_session, operation="turning", duty="light", machine="CNC Lathe 5 axis"):
+    with make_session() as db:
+        return CostCalculationService(db).get_fallback_machine_hour_rate(operation, duty, machine)
+
+
+def test_out_of_process_update_is_picked_up_after_ttl(engine, make_session, clock):
+    _seed(make_session)
+    assert _fallback_rate(make_session) == 10
+
+    # Another worker or a script: separate engine, raw SQL, no ORM events.
+    other = create_engine(engine.url)
+    with other.begin() as conn:
+        conn.execute(text("UPDATE mhr SET machine_hr_rate = 99"))
+    other.dispose()
+
+    clock[0] += svc.LOOKUP_CACHE_TTL_SECONDS - 1
+    assert _fallback_rate(make_session) == 10
+    clock[0] += 2
+    assert _fallback_rate(make_session) == 99
+
+
+def test_invalidation_during_load_is_not_cached(engine, make_session, monkeypatch):
+    _seed(make_session)
+    load = svc._load_lookup_bundle
+
+    def racing_load(bind):
+        bundle = load(bind)
+        CostCalculationService.invalidate_caches()  # a commit lands mid-load
+        return bundle
+
+    monkeypatch.setattr(svc, "_load_lookup_bundle", racing_load)
+    svc._lookup_bundle(engine)
+    assert engine not in svc._lookup_bundles
+
+    monkeypatch.setattr(svc, "_load_lookup_bundle", load)
+    svc._lookup_bundle(engine)
+    assert engine in svc._lookup_bundles
+
+
+def test_api_write_invalidates_immediately(engine, make_session, clock):
+    _seed(make_session)
+    assert _fallback_rate(make_session) == 10
+
+    def override_get_db():
+        db = make_session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = create_app(("mhr",))
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+
+    r = client.put("/mhr/1", json={"op_type_id": 1, "duty_id": 1, "machine_id": 1, "machine_hr_rate": 55})
+    assert r.status_code == 200, r.text
+    assert _fallback_rate(make_session) == 55
+
+    r = client.delete("/mhr/1")
+    assert r.status_code == 200, r.text
+    with pytest.raises(ValueError):
+        _fallback_rate(make_session)
+
+
+def _norm(s: Optional[str]) -> str:
+    if s is None:
+        return ""
+    out = s.strip().lower().replace("_", " ").replace("-", " ")
+    out = " ".join(out.split())
+    if out.endswith(" duty"):
+        out = out[: -len(" duty")]
+    return out
+
+
+def _reference_rate(rows, operation, duty, machine_name):
+    """The per-request scoring loop this cache replaced; rows are (op, duty, machine, rate) by MHR.id."""
+    op_norm, duty_norm, machine_norm = _norm(operation), _norm(duty), _norm(machine_name)
+    best, best_score = None, -1
+    for rec_op, rec_duty, rec_machine, rate in rows:
+        if rec_op.strip().lower() != operation.strip().lower():
+            continue
+        if _norm(rec_op) != op_norm or _norm(rec_duty) != duty_norm:
+            continue
+        rec_machine = _norm(rec_machine)
+        # 2 = exact, 1 = substring match, 0 = mismatch
+        if rec_machine == machine_norm:
+            score = 2
+        elif rec_machine and machine_norm and (rec_machine in machine_norm or machine_norm in rec_machine):
+            score = 1
+        else:
+            score = 0
+        if score > best_score:
+            best, best_score = rate, score
+        if best_score == 2:
+            break
+    return best
+
+
+def test_fallback_matches_reference_scoring(make_session):
+    rnd = random.Random(7)
+    op_names = ["Turning", "Milling", "drilling"]
+    # Several Duty rows per normalized name: the fallback pools them by name.
+    duty_names = ["Light duty", "light", "Light-Duty", "Medium", "medium duty", "Heavy_duty"]
+    machine_names = ["CNC Lathe", "CNC Lathe 5 axis", "Conventional", "Conventional Lathe",
+                     "CNC Milling - 3 Axis", "SPM", "", "lathe"]
+
+    with make_session() as db:
+        ops = [OperationType(id=i + 1, operation_name=n) for i, n in enumerate(op_names)]
+        duties = [Duty(id=i + 1, name=n) for i, n in enumerate(duty_names)]
+        machines = [Machine(id=i + 1, name=n, op_id=1) for i, n in enumerate(machine_names)]
+        db.add_all(ops + duties + machines)
+        rows = []
+        for i in range(60):
+            op, du, m = rnd.choice(ops), rnd.choice(duties), rnd.choice(machines)
+            rate = rnd.choice([None, rnd.randint(100, 999)])
+            db.add(MHR(id=i + 1, op_type_id=op.id, duty_id=du.id, machine_id=m.id, machine_hr_rate=rate))
+            rows.append((op.operation_name, du.name, m.name, rate))
+        db.commit()
+
+    queries = [
+        (rnd.choice(["turning", " Milling ", "DRILLING", "boring"]),
+         rnd.choice(["light", "Light duty", "medium", "heavy", "extra"]),
+         rnd.choice(machine_names + ["CNC", "Conventional Lathe X", "nope"]))
+        for _ in range(200)
+    ]
+    with make_session() as db:
+        service = CostCalculationService(db)
+        for op, du, m in queries:
+            expected = _reference_rate(rows, op, du, m)
+            if expected is None:
+                with pytest.raises(ValueError):
+                    service.get_fallback_machine_hour_rate(op, du, m)
+            else:
+                assert service.get_fallback_machine_hour_rate(op, du, m) == expected, (op, du, m)